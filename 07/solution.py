@@ -118,6 +118,8 @@
 
 from sys import stdin
 import re
+import heapq
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 extract = re.compile(r'Step (.) must be finished before step (.) can begin.')
@@ -129,123 +131,227 @@ def read_input():
     return couples
 
 
-def c2mat(couples):
-    # create chain matrix
+def c2graph(couples):
+    # create sparse chain graph
     # and order of execution
-    allq = set()
-    for a, b in couples:
-        allq.add(a)
-        allq.add(b)
-
-    order = list(allq)
-    order.sort()
-
-    mat = np.zeros((len(order), len(order)))
-
-    for a, b in couples:
-        mat[order.index(a), order.index(b)] = 1
-
-    return mat, order
-
-
-def part_one(mat, order):
-    done = set()       # done items
+    #               - step names are interned in a dict, sorted
+    #                 so that index order is alphabetical order
+    #               - edges are stored in CSR arrays: successors of
+    #                 step i are indices[indptr[i]:indptr[i + 1]]
+    #               - duplicated edges are dropped
+    order = sorted(set(n for c in couples for n in c))
+    ids = {n: i for i, n in enumerate(order)}
+
+    nv = len(order)
+    src = np.fromiter((ids[a] for a, _ in couples), dtype=np.int64,
+                      count=len(couples))
+    dst = np.fromiter((ids[b] for _, b in couples), dtype=np.int64,
+                      count=len(couples))
+
+    # unique sorted edge keys give rows ordered by source
+    keys = np.unique(src * nv + dst)
+    indices = (keys % nv).astype(np.int32)
+    indptr = np.zeros(nv + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // nv, minlength=nv), out=indptr[1:])
+
+    return (indptr, indices), order
+
+
+def indegree(graph, nv):
+    # number of prerequisites of each step
+    indptr, indices = graph
+    return np.bincount(indices, minlength=nv)
+
+
+def release(graph, i, indeg, ready):
+    # step i is done: decrease prerequisites count of its
+    # successors and push the ones without prerequisites
+    # on the ready heap
+    indptr, indices = graph
+    for j in indices[indptr[i]:indptr[i + 1]].tolist():
+        indeg[j] -= 1
+        if indeg[j] == 0:
+            heapq.heappush(ready, j)
+
+
+def part_one(graph, order):
+    indeg = indegree(graph, len(order)).tolist()
+    # ready steps, lowest index (alphabetical) first
+    ready = [i for i in range(len(order)) if indeg[i] == 0]
+    heapq.heapify(ready)
     solution = []      # chain solution
-    while len(done) < len(order):
+    while ready:
         # execute job:
-        #               - job can be executed if
-        #                 - mat column sum to 0
-        #                 - job is not already done
-        #               - append job index to done set
+        #               - first ready job in alphabetical order
         #               - append job letter to solution
-        #               - nullify matrix rows
-        for i in range(len(order)):
-            if (mat[:, i].sum() == 0) and (i not in done):
-                done.add(i)
-                mat[i, :] = 0
-                solution.append(order[i])
-                break
+        #               - release its successors
+        i = heapq.heappop(ready)
+        solution.append(order[i])
+        release(graph, i, indeg, ready)
 
+    if len(solution) < len(order):
+        raise ValueError("dependency cycle among steps")
     return ''.join(solution)
 
 
-def part_two(mat, order, nw, bigst):
+def part_two(graph, order, nw, bigst, verbose=True):
     # configure workers list
     workers = []
     for i in range(nw):
         z = {'t': 0, 'w': -1}
         workers.append(z)
 
-    done = set()             # done items
-    started = set()          # items started
+    indeg = indegree(graph, len(order)).tolist()
+    ready = [i for i in range(len(order)) if indeg[i] == 0]
+    heapq.heapify(ready)
     solution = []            # chain solution
 
     # set time
     seconds = 0
 
-    while len(done) < len(order):
+    while True:
 
-        # free workers: if time (w[t]) is equal seconds,
-        #               and time is greater than 0
+        # free workers: if time (w[t]) is equal seconds
         #               worker has terminated its job
         #               and can be freed
         #               - append job letter to solution
-        #               - append job index to done set
-        #               - nullify matrix rows
+        #               - release successors of the job
         #               - set worker as free w[t] = -1
         for w in workers:
-            if w['t'] == seconds and w['t'] > 0:
+            if w['w'] != -1 and w['t'] == seconds:
                 solution.append(order[w['w']])
-                done.add(w['w'])
-                mat[w['w'], :] = 0
+                release(graph, w['w'], indeg, ready)
                 w['w'] = -1
 
         # give job to free workers (w[t]=-1)
-        #               - job can be executed if
-        #                 - mat column sum to 0
-        #                 - job is not already done
-        #                 - job is not already started
+        #               - first ready job in alphabetical order
         #               - associate job to worker
         #               - calculate time of job
-        #               - add to list of started job
-        for w in workers:
-            if w['w'] == -1:
-                for i in range(len(order)):
-                    if (mat[:, i].sum() == 0) and (i not in done) and (i not in started):
-                        w['w'] = i
-                        w['t'] = seconds + bigst + 1 + i
-                        started.add(i)
-                        break
-
-        # print list of workers and relative jobs
-        row = []
         for w in workers:
-            if w['w'] == -1:
-                row.append('.')
-            else:
-                row.append(order[w['w']])
-
-        print(seconds, '\t'.join(row))
-
-        # increase time
-        seconds += 1
-
-    print('solution:' + ''.join(solution))
-    return seconds - 1
-
-
-chain = read_input()
-mat, order = c2mat(chain)
-part1 = part_one(mat, order)
-# mat is changed, so
-# recreate mat and order
-mat, order = c2mat(chain)
-part2 = part_two(mat, order, 5, 60)
-
-print("\n--- Day 07 ---")
-print("part 1: answer to part one = {}".format(part1))
-print("part 2: answer to part two = {}".format(part2))
-print("--------------\n")
+            if w['w'] == -1 and ready:
+                i = heapq.heappop(ready)
+                w['w'] = i
+                w['t'] = seconds + bigst + 1 + i
+
+        if verbose:
+            # print list of workers and relative jobs
+            row = []
+            for w in workers:
+                if w['w'] == -1:
+                    row.append('.')
+                else:
+                    row.append(order[w['w']])
+
+            print(seconds, '\t'.join(row))
+
+        if len(solution) == len(order):
+            break
+
+        # no job running and none ready: the remaining
+        # steps wait on each other
+        busy = [w['t'] for w in workers if w['w'] != -1]
+        if not busy:
+            raise ValueError("dependency cycle among steps")
+
+        # increase time: one second at a time when printing,
+        # otherwise jump to the next job termination
+        if verbose:
+            seconds += 1
+        else:
+            seconds = min(busy)
+
+    if verbose:
+        print('solution:' + ''.join(solution))
+    return seconds
+
+
+def durations(order, bigst):
+    # time needed by each step
+    return np.arange(len(order), dtype=np.int64) + bigst + 1
+
+
+def critical_path(graph, order, bigst):
+    # length of the longest chain of steps: no number of
+    # workers can complete all the steps in less time
+    indptr, indices = graph
+    dur = durations(order, bigst)
+    start = np.zeros(len(order), dtype=np.int64)   # earliest start
+    indeg = indegree(graph, len(order)).tolist()
+    ready = [i for i in range(len(order)) if indeg[i] == 0]
+    visited = 0
+    while ready:
+        i = ready.pop()
+        visited += 1
+        succ = indices[indptr[i]:indptr[i + 1]]
+        np.maximum.at(start, succ, start[i] + dur[i])
+        for j in succ.tolist():
+            indeg[j] -= 1
+            if indeg[j] == 0:
+                ready.append(j)
+
+    if visited < len(order):
+        raise ValueError("dependency cycle among steps")
+    return int((start + dur).max())
+
+
+# parsed graph in the processes of the pool, set once
+# per process by share
+shared = {}
+
+
+def share(graph, order, bigst):
+    # initializer of the pool processes
+    shared['graph'] = graph
+    shared['order'] = order
+    shared['bigst'] = bigst
+
+
+def makespan(nw):
+    # worker of the process pool: simulate nw workers
+    span = part_two(shared['graph'], shared['order'], nw,
+                    shared['bigst'], verbose=False)
+    return nw, span
+
+
+def analysis(graph, order, nws, bigst):
+    # critical path, lower bound and makespan for every
+    # number of workers in nws; the graph is parsed once
+    # and sent once to each process of the pool, the
+    # simulations only get their number of workers
+    cpath = critical_path(graph, order, bigst)
+    work = int(durations(order, bigst).sum())
+    with ProcessPoolExecutor(initializer=share,
+                             initargs=(graph, order, bigst)) as pool:
+        spans = dict(pool.map(makespan, nws))
+
+    table = []
+    for nw in nws:
+        lower = max(cpath, -(-work // nw))
+        table.append((nw, lower, spans[nw]))
+
+    return cpath, table
+
+
+def print_analysis(cpath, table):
+    print("critical path: {}".format(cpath))
+    print("workers\tlower\tmakespan")
+    for nw, lower, span in table:
+        print("{}\t{}\t{}".format(nw, lower, span))
+
+
+if __name__ == '__main__':
+    chain = read_input()
+    graph, order = c2graph(chain)
+    part1 = part_one(graph, order)
+    part2 = part_two(graph, order, 5, 60)
+
+    # worker pool sizing: critical path and makespans for 1..10 workers
+    # print_analysis(*analysis(graph, order, range(1, 11), 60))
+
+    print("\n--- Day 07 ---")
+    print("part 1: answer to part one = {}".format(part1))
+    print("part 2: answer to part two = {}".format(part2))
+    print("--------------\n")
 
 # --- Day 07 ---
 # part 1: answer to part one = EBICGKQOVMYZJAWRDPXFSUTNLH
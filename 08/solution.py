@@ -84,17 +84,21 @@
 
 
 from sys import stdin
+import time
+import numpy as np
 
 
 def read_input():
-    # read and return stripped list of int for tree contruction
-    return [int(i) for i in stdin.read().strip().split()]
+    # read and return array of int for tree contruction,
+    # numbers are parsed in bulk straight from the bytes
+    return np.fromstring(stdin.buffer.read(), dtype=np.int32, sep=' ')
 
 
 class node(object):
     def __init__(self):
         self.child = []
         self.meta = []
+        self.vn = None      # cached value of node
 
     def getwm(self):
         # get whole metadata sum for this node and its childrens
@@ -105,6 +109,14 @@ class node(object):
 
     def getvn(self):
         # get value of this node based on chlds values
+        # the value is computed once and cached, as a child
+        # can be referenced many times by meta: call it only
+        # when the tree is built, the cache is never invalidated
+        if self.vn is None:
+            self.vn = self.evalvn()
+        return self.vn
+
+    def evalvn(self):
         # if it has not childs its value is the sum of its meta
         if len(self.child) == 0:
             return sum(self.meta)
@@ -160,13 +172,190 @@ def part_one(values):
     get_node(node0, index, values)
 
     # manually add a metadata to the root node, as
-    # it is needed to calculate the values of tree
+    # it is needed to calculate the values of tree,
+    # the metadata sum starts from the real root so
+    # that the dummy metadata is not counted
     node0.meta = [1]
-    return node0.getwm(), node0.getvn()
+    return node0.child[0].getwm(), node0.getvn()
+
+
+def walk(values):
+    # iterative single pass over values with an explicit stack,
+    # no node is created: each frame keeps the number of childs
+    # still to be read, the number of metadata and the values
+    # of the childs already read.
+    # return whole metadata sum and value of root node
+    # (a memoryview of the array gives back plain int)
+    values = memoryview(np.asarray(values, dtype=np.int32))
+    total = 0
+    root = 0
+    stack = [[values[0], values[1], []]]
+    index = 2
+
+    while stack:
+        frame = stack[-1]
+        if frame[0] > 0:
+            # next child header
+            frame[0] -= 1
+            stack.append([values[index], values[index + 1], []])
+            index += 2
+            continue
+
+        # all childs read: metadata follows
+        stack.pop()
+        meta = values[index:index + frame[1]]
+        index += frame[1]
+        msum = sum(meta)
+        total += msum
+
+        # value of node as in node.getvn
+        childs = frame[2]
+        if len(childs) == 0:
+            value = msum
+        else:
+            value = 0
+            for i in meta:
+                if 0 < i <= len(childs):
+                    value += childs[i - 1]
+
+        if stack:
+            stack[-1][2].append(value)
+        else:
+            root = value
+
+    return total, root
+
+
+class flattree(object):
+    # tree as structure of arrays, nodes are numbered in
+    # the order they appear in values (parents before childs):
+    #     parent      index of parent node (-1 for root)
+    #     first       index of first child (-1 if none)
+    #     sibling     index of next sibling (-1 if none)
+    #     moff        offset of metadata in values
+    #     mcnt        number of metadata
+    def __init__(self, values):
+        values = np.asarray(values, dtype=np.int32)
+        self.values = values
+        nmax = len(values) // 2
+        parent = np.full(nmax, -1, dtype=np.int32)
+        first = np.full(nmax, -1, dtype=np.int32)
+        sibling = np.full(nmax, -1, dtype=np.int32)
+        moff = np.zeros(nmax, dtype=np.int32)
+        mcnt = np.zeros(nmax, dtype=np.int32)
+
+        # stack frames: [node, childs still to read, last child read]
+        stack = []
+        n = 0
+        index = 0
+        view = memoryview(values)
+        while True:
+            if stack and stack[-1][1] == 0:
+                # all childs read: metadata follows
+                i = stack.pop()[0]
+                moff[i] = index
+                index += int(mcnt[i])
+                if not stack:
+                    break
+                continue
+
+            # new node: link it to its parent
+            if stack:
+                top = stack[-1]
+                top[1] -= 1
+                parent[n] = top[0]
+                if top[2] == -1:
+                    first[top[0]] = n
+                else:
+                    sibling[top[2]] = n
+                top[2] = n
+
+            mcnt[n] = view[index + 1]
+            stack.append([n, view[index], -1])
+            index += 2
+            n += 1
+
+        self.n = n
+        self.parent = parent[:n]
+        self.first = first[:n]
+        self.sibling = sibling[:n]
+        self.moff = moff[:n]
+        self.mcnt = mcnt[:n]
+
+    def getwm(self):
+        # get whole metadata sum, gathering all metadata at once
+        mcnt = self.mcnt.astype(np.int64)
+        start = np.cumsum(mcnt) - mcnt
+        pos = np.repeat(self.moff - start, mcnt) + np.arange(mcnt.sum())
+        return int(self.values[pos].sum(dtype=np.int64))
+
+    def getvn(self):
+        # get value of root node: childs always follow their
+        # parent, so a single reverse pass evaluates each node
+        # once and after all its childs. Node values are kept in
+        # an int64 array and the int32 arrays are read through
+        # memoryviews, so no per node python objects are made
+        # (a memoryview gives back plain int). Values past 2^63
+        # are redone with an array of python int
+        try:
+            vn = np.zeros(self.n, dtype=np.int64)
+            self.evalvn(memoryview(vn))
+        except ValueError:
+            vn = np.zeros(self.n, dtype=object)
+            self.evalvn(vn)
+        return int(vn[0])
+
+    def evalvn(self, value):
+        # fill value with the value of each node
+        values = memoryview(self.values)
+        first = memoryview(self.first)
+        sibling = memoryview(self.sibling)
+        moff = memoryview(self.moff)
+        mcnt = memoryview(self.mcnt)
+        for i in range(self.n - 1, -1, -1):
+            meta = values[moff[i]:moff[i] + mcnt[i]]
+            if first[i] == -1:
+                value[i] = sum(meta)
+                continue
+
+            v = 0
+            for m in meta:
+                # child m is reached walking m - 1 siblings
+                # from the first one
+                c = first[i] if m > 0 else -1
+                while m > 1 and c != -1:
+                    c = sibling[c]
+                    m -= 1
+                if c != -1:
+                    v += value[c]
+            value[i] = v
+
+
+def bench_repeated(depth=300, k=20):
+    # chain of depth nodes (below the recursion limit of part_one)
+    # where each node refers k times to its only child: without
+    # memoization getvn would do k**depth evaluations of the leaf
+    def flat(values):
+        tree = flattree(values)
+        return tree.getwm(), tree.getvn()
+
+    values = [1, k] * (depth - 1) + [0, 1, 1] + [1] * (k * (depth - 1))
+    for name, f in (('part_one', part_one), ('walk', walk), ('flattree', flat)):
+        t0 = time.perf_counter()
+        f(values)
+        print("{:10}{:10.4f} s".format(name, time.perf_counter() - t0))
 
 
 treevalues = read_input()
-part1, part2 = part_one(treevalues)
+# part_one builds the tree recursively and hits the
+# recursion limit on deep trees, walk does not
+part1, part2 = walk(treevalues)
+# or with the compact array tree
+# tree = flattree(treevalues)
+# part1, part2 = tree.getwm(), tree.getvn()
+
+# benchmark of trees with heavily repeated metadata references
+# bench_repeated()
 
 print("\n--- Day 08 ---")
 print("part 1: answer to part one = {}".format(part1))
@@ -174,7 +363,7 @@ print("part 2: answer to part two = {}".format(part2))
 print("--------------\n")
 
 # --- Day 08 ---
-# part 1: answer to part one = 46097
+# part 1: answer to part one = 46096
 # part 2: answer to part two = 24820
 # --------------
 #
@@ -88,6 +88,13 @@
 from sys import stdin
 import numpy as np
 from collections import deque
+from array import array
+
+try:
+    # optional compiled backend
+    from numba import njit
+except ImportError:
+    njit = None
 
 
 def read_input():
@@ -113,7 +120,7 @@ class circular(object):
 
 
 def part_one(nplayer, nmarble):
-    players = np.zeros(nplayer)
+    players = [0] * nplayer
     mylist = circular()
     m = 0
     mylist.add(m)
@@ -138,12 +145,130 @@ def part_one(nplayer, nmarble):
             wscore = players[i]
             winner = i
 
-    return winner, int(wscore)
+    return winner, wscore
+
+
+def circle(nxt, prv, removed, nmarble):
+    # evolution of the circle up to nmarble, which does not
+    # depend on the number of players: nxt[m] is the marble
+    # clockwise of m, prv[m] the one counter-clockwise, and
+    # removed[k] is the marble taken away when marble
+    # 23 * (k + 1) is played
+    cur = 0
+    k = 0
+    for m in range(1, nmarble + 1):
+        if m % 23 == 0:
+            # remove the marble 7 counter-clockwise
+            for _ in range(7):
+                cur = prv[cur]
+            p = prv[cur]
+            n = nxt[cur]
+            nxt[p] = n
+            prv[n] = p
+            removed[k] = cur
+            k += 1
+            cur = n
+        else:
+            # place between the marbles 1 and 2 clockwise
+            a = nxt[cur]
+            b = nxt[a]
+            nxt[a] = m
+            prv[m] = a
+            nxt[m] = b
+            prv[b] = m
+            cur = m
+
+
+if njit is not None:
+    circle = njit(circle)
+
+
+def circle_deque(nmarble):
+    # interpreted evolution of the circle when numba is missing:
+    # the current marble is kept at the right end of a deque, and
+    # the marbles are played in blocks of 23 so the loop does
+    # only the two deque calls of each placement.
+    # return the marbles removed, as in circle
+    clist = deque([0])
+    rotate = clist.rotate
+    append = clist.append
+    removed = array('q')
+    for m in range(23, nmarble + 1, 23):
+        for a in range(m - 22, m):
+            rotate(-1)
+            append(a)
+        rotate(7)
+        removed.append(clist.pop())
+        rotate(-1)
+    return removed
+
+
+def scoring(nmarble):
+    # return marbles played and marbles removed for
+    # every scoring event of a game up to nmarble
+    nevent = nmarble // 23
+    if njit is None:
+        removed = circle_deque(nmarble)
+    else:
+        nxt = np.zeros(nmarble + 1, dtype=np.uint32)
+        prv = np.zeros(nmarble + 1, dtype=np.uint32)
+        removed = np.zeros(nevent, dtype=np.int64)
+        circle(nxt, prv, removed, nmarble)
+
+    played = 23 * np.arange(1, nevent + 1, dtype=np.int64)
+    return played, np.asarray(removed)
+
+
+def batch(configs):
+    # winner and score for each (players, last marble) in configs.
+    # The events of a game are a prefix of the events of any
+    # longer game, so the circle is simulated only once, up to
+    # the greatest last marble, and each game just adds up
+    # the points of its events to the player who played them
+    played, removed = scoring(max(nm for _, nm in configs))
+    points = played + removed
+
+    results = []
+    for nplayer, nmarble in configs:
+        nevent = nmarble // 23
+        players = scores(played[:nevent], points[:nevent], nplayer)
+        wscore = max(players)
+        results.append((players.index(wscore), wscore))
+
+    return results
+
+
+def scores(played, points, nplayer):
+    # exact total score of each player from the scoring events:
+    # accumulated in int64 with np.add.at when no total can go
+    # past 2^63, with Python int otherwise
+    who = (played - 1) % nplayer
+    if len(points) * int(points.max(initial=0)) < 2**63:
+        players = np.zeros(nplayer, dtype=np.int64)
+        np.add.at(players, who, points)
+        return players.tolist()
+
+    players = [0] * nplayer
+    for i, p in zip(who.tolist(), points.tolist()):
+        players[i] += p
+    return players
+
+
+def play(nplayer, nmarble):
+    # same game as part_one, with the circle as a compiled
+    # doubly linked list in two preallocated arrays indexed by
+    # marble when numba is available (a deque played in blocks
+    # otherwise) and exact scoring of the events
+    played, removed = scoring(nmarble)
+    players = scores(played, played + removed, nplayer)
+    wscore = max(players)
+    return players.index(wscore), wscore
 
 
 nplayers, nmarbles = read_input()
-win1, wsc1 = part_one(nplayers, nmarbles)
-win2, wsc2 = part_one(nplayers, nmarbles * 100)
+# both parts share the same circle evolution
+(win1, wsc1), (win2, wsc2) = batch([(nplayers, nmarbles),
+                                    (nplayers, nmarbles * 100)])
 
 print("\n--- Day 09 ---")
 print("part 1: answer to part one = {}".format(wsc1))
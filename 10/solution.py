@@ -174,79 +174,245 @@
 
 
 from sys import stdin
+import sys
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import re
-from scipy.special import entr
-from pylab import *
-import matplotlib.pyplot as plt
-from PIL import Image
+# PIL is imported only when images are written
 
 candv = re.compile(r".*<(.*),(.*)>.*<(.*),(.*)>")
 
+# 6x10 glyphs of the message letters, as rows of the letter
+glyphs = {
+    'A': ('..##..', '.#..#.', '#....#', '#....#', '#....#',
+          '######', '#....#', '#....#', '#....#', '#....#'),
+    'B': ('#####.', '#....#', '#....#', '#....#', '#####.',
+          '#....#', '#....#', '#....#', '#....#', '#####.'),
+    'C': ('.####.', '#....#', '#.....', '#.....', '#.....',
+          '#.....', '#.....', '#.....', '#....#', '.####.'),
+    'E': ('######', '#.....', '#.....', '#.....', '#####.',
+          '#.....', '#.....', '#.....', '#.....', '######'),
+    'F': ('######', '#.....', '#.....', '#.....', '#####.',
+          '#.....', '#.....', '#.....', '#.....', '#.....'),
+    'G': ('.####.', '#....#', '#.....', '#.....', '#.....',
+          '#..###', '#....#', '#....#', '#...##', '.###.#'),
+    'H': ('#....#', '#....#', '#....#', '#....#', '######',
+          '#....#', '#....#', '#....#', '#....#', '#....#'),
+    'J': ('...###', '....#.', '....#.', '....#.', '....#.',
+          '....#.', '....#.', '#...#.', '#...#.', '.###..'),
+    'K': ('#....#', '#...#.', '#..#..', '#.#...', '##....',
+          '##....', '#.#...', '#..#..', '#...#.', '#....#'),
+    'L': ('#.....', '#.....', '#.....', '#.....', '#.....',
+          '#.....', '#.....', '#.....', '#.....', '######'),
+    'N': ('#....#', '##...#', '##...#', '#.#..#', '#.#..#',
+          '#..#.#', '#..#.#', '#...##', '#...##', '#....#'),
+    'P': ('#####.', '#....#', '#....#', '#....#', '#####.',
+          '#.....', '#.....', '#.....', '#.....', '#.....'),
+    'R': ('#####.', '#....#', '#....#', '#....#', '#####.',
+          '#..#..', '#...#.', '#...#.', '#....#', '#....#'),
+    'X': ('#....#', '#....#', '.#..#.', '.#..#.', '..##..',
+          '..##..', '.#..#.', '.#..#.', '#....#', '#....#'),
+    'Z': ('######', '.....#', '.....#', '....#.', '...#..',
+          '..#...', '.#....', '#.....', '#.....', '######'),
+}
+
 def read_input():
     coords = [candv.search(x).groups() for x in stdin.read().strip().split('\n')]
     return [(int(x[0]), int(x[1]), int(x[2]), int(x[3])) for x in coords]
 
-def part_one(coords):
+def converge(coords, window=3):
+    # time of the message in closed form: the spread of the points
+    # around their mean is a quadratic in t, whose least squares
+    # minimum is
+    #     t* = - sum((p - pm) . (v - vm)) / sum(|v - vm|^2)
+    # then the minimum bounding box area in a small window
+    # around t* gives the exact second
+    # one contiguous row per column, reductions on the strided
+    # columns of a (n, 4) array are several times slower
+    x, y, vx, vy = np.asarray(coords, dtype=np.int64).T.copy()
+    n = len(x)
+    sx, sy, svx, svy = x.sum(), y.sum(), vx.sum(), vy.sum()
+    # centered sums without the centered copies
+    den = (vx @ vx - svx * svx / n) + (vy @ vy - svy * svy / n)
+    if den == 0:
+        # all points move together: the image never changes,
+        # any time has the minimum area
+        return 0
+    tls = -((x @ vx - sx * svx / n) + (y @ vy - sy * svy / n)) / den
+
+    lo = max(0, int(np.floor(tls)) - window)
+    hi = int(np.ceil(tls)) + window
+    ts = np.arange(lo, hi + 1)
+    # the area only depends on the few points that can be
+    # on the bounding box somewhere in the window
+    x, vx = extremes(x, vx, lo, hi)
+    y, vy = extremes(y, vy, lo, hi)
+
+    def area(t):
+        q = x + vx * t
+        r = y + vy * t
+        return int(q.max() - q.min()) * int(r.max() - r.min())
+
+    return min(ts.tolist(), key=area)
+
+
+def extremes(p, v, lo, hi):
+    # points whose coordinate p + v t can be the maximum or the
+    # minimum at some integer t in [lo, hi]: a line is highest at
+    # one of the ends of the window, so it can be the maximum
+    # only if it gets there above a lower bound of the maximum,
+    # the upper envelope of the lines that are the maximum at lo
+    # and at hi (and the same for the minimum)
+    a = v * lo
+    a += p
+    b = v * (hi - lo)
+    b += a
+    ts = np.arange(lo, hi + 1)
+    i, j = a.argmax(), b.argmax()
+    top = np.maximum(p[i] + v[i] * ts, p[j] + v[j] * ts).min()
+    i, j = a.argmin(), b.argmin()
+    bot = np.minimum(p[i] + v[i] * ts, p[j] + v[j] * ts).max()
+    keep = a >= top
+    keep |= b >= top
+    keep |= a <= bot
+    keep |= b <= bot
+    return p[keep], v[keep]
+
+
+def vectors(coords):
+    # positions and velocities as (n, 2) int64 arrays
+    a = np.asarray(coords, dtype=np.int64)
+    return a[:, :2], a[:, 2:]
+
+
+def histogram(pos, vel, t, origin, shape, siz=1):
+    # number of points at time t in each cell of an image of
+    # given shape (x, y), a point falls in (pos + vel * t - origin) // siz
+    q = (pos + vel * t - origin) // siz
+    inside = ((q >= 0) & (q < shape)).all(axis=1)
+    flat = q[inside, 0] * shape[1] + q[inside, 1]
+    return np.bincount(flat, minlength=shape[0] * shape[1]).reshape(shape)
+
+
+def entr(S):
+    # elementwise entropy -S log(S), 0 where S is 0
+    E = np.zeros(S.shape)
+    nz = S > 0
+    E[nz] = -S[nz] * np.log(S[nz])
+    return E
+
+
+def bitmap(pos, vel, t):
+    # boolean image (rows y, columns x) of the points at time t
+    # inside their bounding box
+    q = pos + vel * t
+    origin = q.min(axis=0)
+    shape = tuple((q.max(axis=0) - origin + 1).tolist())
+    return histogram(pos, vel, t, origin, shape).T > 0
+
+
+def text(pos, vel, t):
+    # headless rendering of the points at time t inside their
+    # bounding box, '#' for a point and '.' for empty
+    B = bitmap(pos, vel, t)
+    return '\n'.join(''.join('#' if c else '.' for c in row) for row in B)
+
+
+def ocr(pos, vel, t):
+    # read the message at time t: letters are the runs of
+    # non empty columns of the bitmap (split every 6 columns
+    # if touching), each one matched against glyphs,
+    # '?' for an unknown letter
+    B = bitmap(pos, vel, t)
+    table = {g: k for k, g in glyphs.items()}
+    used = np.flatnonzero(B.any(axis=0))
+    runs = np.split(used, np.flatnonzero(np.diff(used) > 1) + 1)
+
+    message = []
+    for run in runs:
+        for c in range(run[0], run[-1] + 1, 6):
+            letter = B[:, c:min(c + 6, run[-1] + 1)]
+            rows = tuple(''.join('#' if p else '.' for p in row).ljust(6, '.')
+                         for row in letter)
+            message.append(table.get(rows, '?'))
+
+    return ''.join(message)
+
+
+def frame(pos, vel, t, origin, shape):
+    # image (rows y, columns x) of the points at time t
+    S = histogram(pos, vel, t, origin, shape)
+    return np.where(S.T > 0, 255, 0).astype(np.uint8)
+
+
+def export(pos, vel, times, origin, shape, fmt='jpg', workers=None):
+    # write one image file per time, rendering and encoding
+    # are done in a thread pool (PIL releases the GIL while
+    # encoding), use fmt='png' for lossless images
+    from PIL import Image
+
+    def save(t):
+        im = Image.fromarray(frame(pos, vel, t, origin, shape))
+        im.save("{}.{}".format(t, fmt))
+
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(save, times))
+
+
+def animate(pos, vel, times, origin, shape, name='message.gif', duration=100):
+    # write a single animated gif, each frame is rendered, encoded
+    # and written before the next one (Image.save with save_all
+    # would first keep all the frames in memory)
+    from PIL import Image, GifImagePlugin
+    with open(name, 'wb') as fp:
+        for i, t in enumerate(times):
+            im = Image.fromarray(frame(pos, vel, t, origin, shape))
+            if i == 0:
+                info = {'loop': 0, 'duration': duration}
+                header, _ = GifImagePlugin.getheader(im, info=info)
+                fp.writelines(header)
+            fp.writelines(GifImagePlugin.getdata(im, duration=duration))
+        fp.write(b';')                # gif trailer
+
+
+def part_one(coords, the_t0=None, output='jpg', nframe=20):
+    # text and ocr need the exact time, the entropy scan only
+    # finds an approximate one, good for inspecting frames
+    if the_t0 is None and output in ('text', 'ocr'):
+        the_t0 = converge(coords)
+
+    pos, vel = vectors(coords)
+    n = len(pos)                      # number of point
+
     # get min max of image
-    xmin = np.Inf
-    xmax = -np.Inf
-
-    ymin = np.Inf
-    ymax = -np.Inf
-
-    xvmin = np.Inf
-    xvmax = -np.Inf
-
-    yvmin = np.Inf
-    yvmax = -np.Inf
-    
-    for x, y, vx, vy in coords:
-        if xmin > x:
-            xmin = x
-        if ymin > y:
-            ymin = y
-        if xmax < x:
-            xmax = x
-        if ymax < y:
-            ymax = y
-        if xvmin > vx:
-            xvmin = vx
-        if yvmin > vy:
-            yvmin = vy
-        if xvmax < vx:
-            xvmax = vx
-        if yvmax < vy:
-            yvmax = vy
+    pmin = pos.min(axis=0)
+    pmax = pos.max(axis=0)
 
     # calculate image size
-    X = xmax - xmin
-    Y = ymax - ymin
+    X, Y = (pmax - pmin).tolist()
 
-    pmin = np.Inf                     # minimum entropy
-    the_t0 = -1                       # estimated final time
+    pmin_entr = np.inf                # minimum entropy
     t = 0                             # time
     citeration = True                 # if False stop iteration
     siz = 250                         # image size reduction factor
     # instead of iterating through to all t we could use
     # a fast gradient methods, but by reducing the image size
     # semmes that there is non need of such optimization
+    if the_t0 is None:
+        the_t0 = -1                   # estimated final time
+    else:
+        citeration = False            # time of minimum already known
+
     while citeration:
-        S = np.zeros((X//siz,Y//siz))                        # image
-        n = 0                                                # number of point
-        for x, y, vx, vy in coords:
-            nx = (x + vx * t - xmin ) // siz
-            ny = (y + vy * t - ymin) // siz
-            if  (0 <= nx < X//siz) and (0 <= ny < Y//siz):
-                S[nx, ny] += 1
-
-            n += 1
+        S = histogram(pos, vel, t, pmin, (X // siz, Y // siz), siz)  # image
         # we calculate entropy of reduced image
-        p = (entr(S).sum(axis=0) / np.log(2))
-        if pmin > sum(p) :
-            pmin = sum(p)
+        p = entr(S).sum() / np.log(2)
+        if pmin_entr > p:
+            pmin_entr = p
             the_t0 = t
-        
+
         t += 1
 
         # stop when half of the points ore out of sight
@@ -254,46 +420,81 @@ def part_one(coords):
         if t > 100000:
             citeration = False
 
-        if sum(sum(S)) < (n//2):
+        if S.sum() < (n // 2):
             citeration = False
 
+    if output == 'text':
+        print(text(pos, vel, the_t0))
+        return the_t0
+
+    if output == 'ocr':
+        return ocr(pos, vel, the_t0)
 
     # calculate mean and deviation of image at time the_t (minimum entropy)
-    nx = 0
-    ny = 0
-    N = 0
-    for x, y, vx, vy in coords:
-        nx += (x + vx * the_t0 - xmin)
-        ny += (y + vy * the_t0 - ymin)
-        N += 1
-
-    xx = nx / N
-    yy = ny / N
-
-    for x, y, vx, vy in coords:
-        nx += (x + vx * the_t0 - xmin - xx)**2
-        ny += (y + vy * the_t0 - ymin - yy)**2
-
-    sx = (nx/(N-1))**(1/2)
-    sy = (ny/(N-1))**(1/2)
-
-    # Use mean and stdev to calculate bounding box of image to represent
-    # plot the 20 image around the approssimate minimum 
+    q = pos + vel * the_t0
+    mean = q.mean(axis=0)
+    sd = q.std(axis=0, ddof=1)
+
+    # Use mean and 3 stdev to calculate bounding box of image to represent
+    # plot the nframe image around the approssimate minimum
     # for successive visual inspect
-    for t in range(20):
-        the_t = the_t0 + t - 9
-        S = np.zeros((2*int(sy)+1,2*int(sx)+1))
-        for x, y, vx, vy in coords:
-            nx = (x + vx * the_t - xmin)
-            ny = (y + vy * the_t - ymin)
-            if  (xx - sx <= nx < xx + sx) and (yy -sy<= ny < yy +sy):
-                S[int(ny - yy + sy), int(nx - xx + sx)] = 255
-                
-        im = Image.fromarray(S.astype(np.uint8))
-        im.save("{}.jpg".format(the_t))  # show()
-        
+    origin = np.floor(mean - 3 * sd).astype(np.int64)
+    shape = tuple((2 * np.ceil(3 * sd) + 1).astype(np.int64).tolist())
+    times = range(the_t0 - nframe // 2 + 1, the_t0 + nframe - nframe // 2 + 1)
+    if output == 'gif':
+        animate(pos, vel, times, origin, shape)
+    else:
+        export(pos, vel, times, origin, shape, output)
+
+    return the_t0
+
+
+def bench_converge(coords, n=2000000):
+    # time of converge on n points, the input repeated, it
+    # must find the same second as on the input alone
+    t = converge(coords)
+    big = np.resize(np.asarray(coords, dtype=np.int64), (n, 4))
+    t0 = time.perf_counter()
+    tbig = converge(big)
+    dt = time.perf_counter() - t0
+    assert tbig == t, (tbig, t)
+    print("converge {} points {:8.3f} s".format(n, dt))
+
+
+def bench_startup():
+    # time to start an interpreter and import the modules of
+    # the headless run, of the image output and the modules
+    # that were imported at load before
+    for name, mods in (('text', 'numpy, re'),
+                       ('image', 'numpy, re, PIL.Image'),
+                       ('eager', 'numpy, re, scipy.special, pylab, '
+                                 'matplotlib.pyplot, PIL.Image')):
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'import ' + mods], check=True)
+        print("{:8}{:8.3f} s".format(name, time.perf_counter() - t0))
+
+
 coords = read_input()
-part_one(coords)
+# message time from converge instead of the entropy scan
+the_t0 = converge(coords)
+message = part_one(coords, the_t0, output='ocr')
+# to inspect the 20 images around the message
+# part_one(coords, the_t0)
+# or 200 lossless images, or an animation
+# part_one(coords, the_t0, output='png', nframe=200)
+# part_one(coords, the_t0, output='gif', nframe=200)
+# on headless nodes print the message as text instead
+# part_one(coords, the_t0, output='text')
+
+# startup time of headless and image runs
+# bench_startup()
+# time of the message time on two million points
+# bench_converge(coords)
+
+print("\n--- Day 10 ---")
+print("part 1: answer to part one = {}".format(message))
+print("part 2: answer to part two = {}".format(the_t0))
+print("--------------\n")
 #
 # Solution by visual inspectio of result image files
 #
@@ -102,13 +102,16 @@
 # Your puzzle input is still 3463.
 
 
+from sys import stdout
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 
 
 def part_one(mpw):
     X = 0
     Y = 0
-    maxpw = -np.Inf
+    maxpw = -np.inf
 
     size = 3
     for x in range(1, 300 + 2 - size):
@@ -126,7 +129,7 @@ def part_one(mpw):
 def part_two(mpw):
     X = 0
     Y = 0
-    maxpw = -np.Inf
+    maxpw = -np.inf
 
     for size in range(1, 301):
         # print(size)
@@ -142,36 +145,163 @@ def part_two(mpw):
     return X, Y, S, maxpw
 
 
+def get_mats(serials, W=300, H=300):
+    "calculate stack of matrices of power levels, one for each serial"
+    # mats[i, x, y] is the power level of cell (x, y) for serials[i],
+    # row and column 0 are left at 0 as coordinates start from 1
+    serial = np.asarray(serials, dtype=np.int64)[:, None, None]
+    x = np.arange(1, W + 1, dtype=np.int64)[None, :, None]
+    y = np.arange(1, H + 1, dtype=np.int64)[None, None, :]
+    # Find the fuel cell's rack ID, which is its X coordinate plus 10.
+    rack_id = x + 10
+    # Begin with a power level of the rack ID times the Y coordinate,
+    # increase it by the value of the grid serial number and
+    # multiply it by the rack ID.
+    power_level = (rack_id * y + serial) * rack_id
+    # Keep only the hundreds digit of the power level,
+    # then subtract 5 from the power level.
+    mats = np.zeros((serial.shape[0], W + 1, H + 1), dtype=int)
+    mats[:, 1:, 1:] = (power_level // 100) % 10 - 5
+    return mats
+
+
 def get_mat(serial):
     "calculate matrix of power levels"
-    lmpw = np.zeros((301, 301), dtype=int)
-
-    for x in range(1, 301):
-        for y in range(1, 301):
-            # Find the fuel cell's rack ID, which is its X coordinate plus 10.
-            rack_id = x + 10
-            # Begin with a power level of the rack ID times the Y coordinate.
-            power_level = rack_id * y
-            # Increase the power level by the value of the grid serial number
-            power_level += serial
-            # Set the power level to itself multiplied by the rack ID.
-            power_level *= rack_id
-            # Keep only the hundreds digit of the power level
-            power_level = int(np.trunc((power_level % 1000) / 100))
-            # Subtract 5 from the power level.
-            power_level -= 5
-            lmpw[x, y] = power_level
-    return lmpw
-
-
-gmpw = get_mat(3463)
-X, Y, _, maxpw = part_one(gmpw)
-X1, Y1, S1, maxpw1 = part_two(gmpw)
-
-print("\n--- Day 11 ---")
-print("part 1: answer to part one = {},{}".format(X, Y))
-print("part 2: answer to part two = {},{},{}".format(X1, Y1, S1))
-print("--------------\n")
+    return get_mats([serial])[0]
+
+
+def prefix(mpw):
+    "summed-area table: P[x, y] is the sum of mpw[:x, :y]"
+    # works as well on a stack of matrices from get_mats
+    shape = mpw.shape[:-2] + (mpw.shape[-2] + 1, mpw.shape[-1] + 1)
+    P = np.zeros(shape, dtype=np.int64)
+    P[..., 1:, 1:] = mpw.cumsum(axis=-2).cumsum(axis=-1)
+    return P
+
+
+def best(P, size):
+    "best square of given size from summed-area table P"
+    # totals of all the squares at once, T[x, y] is
+    # mpw[x:x + size, y:y + size].sum() (row and column 0 are unused)
+    T = P[size:, size:] - P[:-size, size:] - P[size:, :-size] + P[:-size, :-size]
+    T = T[1:, 1:]
+    x, y = np.unravel_index(T.argmax(), T.shape)
+    return int(x) + 1, int(y) + 1, size, int(T[x, y])
+
+
+def sweep(P, sizes=None):
+    "best square over all sizes, as part_two"
+    if sizes is None:
+        sizes = range(1, min(P.shape) - 1)
+
+    X, Y, S, maxpw = 0, 0, 0, -np.inf
+    for size in sizes:
+        x, y, size, pw = best(P, size)
+        if pw > maxpw:
+            X, Y, S, maxpw = x, y, size, pw
+
+    return X, Y, S, maxpw
+
+
+def bound(M, n):
+    "upper bound of the best square of every size up to n"
+    # M[s] is the best total for the sizes already searched
+    # (M[1] is the maximum power of a cell). A square of size
+    # t = a + b, with a = b or a = b + 1, splits in an a-square,
+    # a b-square and two a x b rectangles, each of them a b-square
+    # plus a strip of b cells that adds at most b * M[1]
+    B = list(M) + [None] * (n + 1 - len(M))
+    for t in range(len(M), n + 1):
+        b = t // 2
+        a = t - b
+        if a == b:
+            B[t] = 4 * B[b]
+        else:
+            B[t] = B[a] + 3 * B[b] + 2 * b * B[1]
+    return B
+
+
+def psweep(P):
+    "best square over all sizes, stopping when no larger size can win"
+    # return the same as sweep and the number of sizes searched
+    n = min(P.shape) - 2
+    M = [None]
+    X, Y, S, maxpw = 0, 0, 0, -np.inf
+    for size in range(1, n + 1):
+        x, y, size, pw = best(P, size)
+        M.append(pw)
+        if pw > maxpw:
+            X, Y, S, maxpw = x, y, size, pw
+
+        if max(bound(M, n)[size + 1:], default=maxpw) <= maxpw:
+            break
+
+    return (X, Y, S, maxpw), size
+
+
+def bench_prune(serials=range(1, 51)):
+    "compare exhaustive and pruned sweep, with the work skipped"
+    t_full = t_prune = 0
+    work = skipped = 0
+    for serial in serials:
+        P = prefix(get_mat(serial))
+        t0 = time.perf_counter()
+        full = sweep(P)
+        t1 = time.perf_counter()
+        pruned, last = psweep(P)
+        t2 = time.perf_counter()
+        assert full == pruned
+        t_full += t1 - t0
+        t_prune += t2 - t1
+        # work of a size is the number of squares of that size
+        n = min(P.shape) - 2
+        cost = [(n + 1 - s) ** 2 for s in range(1, n + 1)]
+        work += sum(cost)
+        skipped += sum(cost[last:])
+
+    print("exhaustive {:.3f} s, pruned {:.3f} s".format(t_full, t_prune))
+    print("work skipped {:.1%}".format(skipped / work))
+
+
+def solve(serials):
+    "best square of every serial, run by the workers of batch"
+    Ps = prefix(get_mats(serials))
+    return [(s,) + psweep(P)[0] for s, P in zip(serials, Ps)]
+
+
+def batch(serials, chunk=16):
+    "best square of many serials, in chunks on a process pool"
+    serials = list(serials)
+    chunks = [serials[i:i + chunk] for i in range(0, len(serials), chunk)]
+    with ProcessPoolExecutor() as pool:
+        return [row for rows in pool.map(solve, chunks) for row in rows]
+
+
+def write_table(rows, out=stdout):
+    "write rows of (serial, x, y, size, power) as a table"
+    out.write("serial\tx\ty\tsize\tpower\n")
+    for row in rows:
+        out.write("\t".join(str(v) for v in row) + "\n")
+
+
+if __name__ == '__main__':
+    gmpw = get_mat(3463)
+    # part_one and part_two sum every square, with the
+    # summed-area table each square is four lookups
+    gsat = prefix(gmpw)
+    X, Y, _, maxpw = best(gsat, 3)
+    (X1, Y1, S1, maxpw1), _ = psweep(gsat)
+
+    # best square of many serial numbers
+    # write_table(batch(range(1, 1001)))
+
+    # work saved by the pruned sweep
+    # bench_prune()
+
+    print("\n--- Day 11 ---")
+    print("part 1: answer to part one = {},{}".format(X, Y))
+    print("part 2: answer to part two = {},{},{}".format(X1, Y1, S1))
+    print("--------------\n")
 # --- Day 11 ---
 # part 1: answer to part one = 235,60
 # part 2: answer to part two = 233,282,11
@@ -119,6 +119,7 @@
 
 from sys import stdin
 import re
+import numpy as np
 
 extract = re.compile(r'Step (.) must be finished before step (.) can begin.')
 extract = re.compile(r'Step (.) must be finished before step (.) can begin.')
@@ -162,14 +163,10 @@ def transform(status):
 
 def part_one(ist, inst, n):
 
-    nist = [i for i in ist]
     # append 30 more palce to left and right of
     # places for pots
     padd = 30
-    for i in range(padd):
-        nist.insert(0, 0)
-    for i in range(padd):
-        nist.append(0)
+    nist = [0] * padd + list(ist) + [0] * padd
 
     # uncomment this to print pots stages
     # print(0, '\t', transform(nist))
@@ -193,14 +190,10 @@ def part_one(ist, inst, n):
 
 
 def part_two(ist, inst, n):
-    nist = [i for i in ist]
     # append 280 more palce to left and right of
     # places for pots
     padd = 280
-    for i in range(padd):
-        nist.insert(0, 0)
-    for i in range(padd):
-        nist.append(0)
+    nist = [0] * padd + list(ist) + [0] * padd
 
     # uncomment this to print pots stages
     # print(0, '\t', transform(nist))
@@ -223,14 +216,141 @@ def part_two(ist, inst, n):
     return n
 
 
+def rule_table(inst):
+    # lookup table of the 32 possible patterns of 5 pots,
+    # indexed by the pattern read as a binary number
+    # (leftmost pot is the most significant bit)
+    table = np.zeros(32, dtype=np.uint8)
+    for q in inst:
+        index = 0
+        for i in q['i']:
+            index = 2 * index + i
+        table[index] = q['r']
+    return table
+
+
+def trim(pots, offset):
+    # live window of pots, from the first to the last plant,
+    # and number of its first pot
+    live = np.flatnonzero(pots)
+    if len(live) == 0:
+        return pots[:0], 0
+    return pots[live[0]:live[-1] + 1], offset + int(live[0])
+
+
+def advance(pots, offset, table):
+    # next generation of the live window pots whose first pot is
+    # number offset: the window grows by the pots a plant can
+    # reach each side and is trimmed again
+    grown = np.zeros(len(pots) + 8, dtype=np.uint8)
+    grown[4:-4] = pots
+    mist = table[np.convolve(grown, [1, 2, 4, 8, 16], mode='same')]
+    return trim(mist, offset - 4)
+
+
+def simulate(ist, table, n):
+    # same as part_one and part_two with the rule table, but
+    # only the live window is stored (one byte per pot) and it
+    # grows as far as the plants spread, with no fixed padding
+    pots, offset = trim(np.array(ist, dtype=np.uint8), 0)
+    for i in range(1, n + 1):
+        pots, offset = advance(pots, offset, table)
+
+    return potsum(pots, offset)
+
+
+def potsum(pots, offset):
+    # sum of the numbers of the pots with a plant
+    count = int(pots.sum(dtype=np.int64))
+    return int((np.arange(len(pots)) * pots).sum()) + offset * count
+
+
+def steady(ist, table, n, limit=1000):
+    # sum of pots after n generations: when the trimmed pattern
+    # repeats, it has become a glider that moves shift pots
+    # every period generations, and the sum is extrapolated.
+    # A repeat is searched in the first limit generations only
+    if table[0]:
+        raise ValueError("empty pots grow plants: infinite pattern")
+
+    pots, offset = trim(np.array(ist, dtype=np.uint8), 0)
+    seen = {pots.tobytes(): (0, offset)}
+    for g in range(1, n + 1):
+        pots, offset = advance(pots, offset, table)
+        key = pots.tobytes()
+        if key in seen:
+            g0, offset0 = seen[key]
+            period = g - g0
+            shift = offset - offset0
+            # the r generations left after the last whole
+            # period are simulated from the repeated pattern
+            cycles, r = divmod(n - g, period)
+            for i in range(r):
+                pots, offset = advance(pots, offset, table)
+            return potsum(pots, offset + cycles * shift)
+
+        if g == limit and g < n:
+            raise ValueError("no repeating pattern in {} generations"
+                             .format(limit))
+        seen[key] = (g, offset)
+
+    return potsum(pots, offset)
+
+
+def bigstep(row, table):
+    # next generation of a row stored as one big int, bit i is
+    # the pot offset + i: the 5 shifted copies of the row give
+    # the neighbours of every pot, the masks of the pots with
+    # each of the 32 neighbourhoods are built sharing their
+    # common prefixes, and the ones growing a plant are OR-ed.
+    # Return the new row, to be read from offset - 4
+    R = row << 4
+    full = (1 << (R.bit_length() + 4)) - 1
+    # pot h + k - 2 of R is bit h of A[k]
+    A = [R << 2, R << 1, R, R >> 1, R >> 2]
+    N = [full ^ a for a in A]
+
+    def grow(k, mask, p):
+        if mask == 0:
+            return 0
+        if k == 5:
+            return mask if table[p] else 0
+        return (grow(k + 1, mask & A[k], 2 * p + 1) |
+                grow(k + 1, mask & N[k], 2 * p))
+
+    return grow(0, full, 0)
+
+
+def bigsimulate(ist, table, n):
+    # same as simulate with the row held in a big int, so
+    # that the C bigint operations work on many pots at once
+    if table[0]:
+        raise ValueError("empty pots grow plants: infinite pattern")
+
+    row = sum(1 << i for i, v in enumerate(ist) if v)
+    offset = 0
+    for i in range(1, n + 1):
+        row = bigstep(row, table)
+        offset -= 4
+        # trim the empty pots at the left
+        if row:
+            low = (row & -row).bit_length() - 1
+            row >>= low
+            offset += low
+
+    nbyte = (row.bit_length() + 7) // 8
+    bits = np.unpackbits(np.frombuffer(row.to_bytes(nbyte, 'little'),
+                                       dtype=np.uint8), bitorder='little')
+    return potsum(bits, offset)
+
+
 first, notes = read_input()
-part1 = part_one(first, notes, 20)
-# by visual inspection of a prolonged
-# part 1 the pattern became constant after 100 generations
-#        so we take de difference between 101th and 100th generation
-#        and multiply it for the opportune number
-part2 = ((part_two(first, notes, 101) - part_two(first, notes, 100)) *
-         (50000000000 - 100) + part_two(first, notes, 100))
+rules = rule_table(notes)
+part1 = simulate(first, rules, 20)
+# or with the row in a big int
+# part1 = bigsimulate(first, rules, 20)
+# the pattern becomes a glider, detected by steady
+part2 = steady(first, rules, 50000000000)
 
 print("\n--- Day 12 ---")
 print("part 1: answer to part one = {}".format(part1))
@@ -250,20 +250,21 @@ scars = {'^': 1, '>': 1j, 'v': -1, '<': -1j}
 
 
 class carlist(object):
+    # occupancy index: position (x, y) -> car in that position
     def __init__(self):
-        self.cars = []
+        self.cars = dict()
 
-    def append(self, tup):
+    def append(self, tup, car=None):
         if tup in self.cars:
             return False
-        self.cars.append(tup)
+        self.cars[tup] = car
         return True
 
     def remove(self, tup):
-        if tup not in self.cars:
-            return False
-        self.cars.remove(tup)
-        return True
+        return self.cars.pop(tup, None)
+
+    def get(self, tup):
+        return self.cars.get(tup)
 
 
 class car(object):
@@ -298,6 +299,65 @@ class car(object):
         self.index = (self.index + 1) % 3
 
 
+# integer representation: track types, directions and moves
+# (x, y) of directions up, right, down, left
+itrack = {2: 0, 1j: 1, -1j: 2, 1: 3, -1: 4, 0: 5}   # ' ', |, -, /, \, +
+icars = {1: 0, 1j: 1, -1: 2, -1j: 3}                 # ^, >, v, <
+moves = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+
+def lookup_table():
+    # (track type, direction, turn state) ->
+    #              (new direction, new turn state, dx, dy)
+    slash = (1, 0, 3, 2)        # / : up <-> right, down <-> left
+    backslash = (3, 2, 1, 0)    # \ : up <-> left, right <-> down
+    table = np.zeros((6, 4, 3, 4), dtype=np.int8)
+    for t in range(6):
+        for d in range(4):
+            for s in range(3):
+                nd, ns = d, s
+                if t == 3:
+                    nd = slash[d]
+                elif t == 4:
+                    nd = backslash[d]
+                elif t == 5:
+                    # turn left, go straight, turn right
+                    nd = (d + s - 1) % 4
+                    ns = (s + 1) % 3
+                table[t, d, s] = (nd, ns) + moves[nd]
+    return table
+
+
+class icar(object):
+    # car moved by the lookup table on the uint8 track
+
+    lut = lookup_table().tolist()
+
+    def __init__(self, x, y, d, s=0):
+        self.x = x
+        self.y = y
+        self.d = d
+        self.s = s
+
+    def step(self, grid):
+        x = self.x
+        y = self.y
+        self.d, self.s, dx, dy = self.lut[grid[x][y]][self.d][self.s]
+        self.x += dx
+        self.y += dy
+        return (x, y), (self.x, self.y)
+
+
+def convert(track, cars):
+    # uint8 track grid, as nested lists for the tick loop,
+    # and cars with integer direction and turn state
+    grid = np.zeros(track.shape, dtype=np.uint8)
+    for k, t in itrack.items():
+        grid[track == k] = t
+
+    return grid.tolist(), [icar(c.x, c.y, icars[c.d], c.index) for c in cars]
+
+
 def read_input():
     lines = stdin.read().split('\n')
     clist = []
@@ -330,6 +390,13 @@ def read_input():
 
 
 def represent(track, carlist, crash=None, carlist2=None):
+    # works with the complex track and car, and with the
+    # uint8 grid and icar from convert
+    if not np.iscomplexobj(track):
+        types = {t: k for k, t in itrack.items()}
+        track = np.vectorize(types.get, otypes=[complex])(np.asarray(track))
+    dirs = {d: k for k, d in icars.items()}
+
     nx, ny = track.shape
     stinv = dict()
     scinv = dict()
@@ -346,7 +413,8 @@ def represent(track, carlist, crash=None, carlist2=None):
             visual[y, x] = stinv[track[x, y]]
 
     for c in carlist:
-        visual[c.y, c.x] = scinv[c.d]
+        d = dirs[c.d] if isinstance(c, icar) else c.d
+        visual[c.y, c.x] = scinv[d]
 
     if crash is not None:
         visual[crash[1], crash[0]] = 'X'
@@ -359,7 +427,7 @@ def part_one(track, cars):
     position = carlist()
 
     for i, c in enumerate(cars):
-        position.append((c.x, c.y))
+        position.append((c.x, c.y), c)
 
     crashed = set()
     firstcrash = True
@@ -374,19 +442,15 @@ def part_one(track, cars):
             old, new = c.step(track)
             position.remove(old)
 
-            if not position.append(new):
+            if not position.append(new, c):
                 # represent(track, cars, new)
                 if firstcrash:
                     ftick, fnew = tick, new
                     firstcrash = False
 
+                # remove the other car from the index
                 crashed.add(c)
-                for s in cars:
-                    if s not in crashed:
-                        if (s.x, s.y) == new:
-                            crashed.add(s)
-
-                position.remove(new)
+                crashed.add(position.remove(new))
 
                 if len(crashed) == (len(cars) - 1):
                     for s in cars:
@@ -398,7 +462,9 @@ def part_one(track, cars):
 
 
 track, cars = read_input()
-tick, first_crash, last_car_pos = part_one(track, cars)
+# integer track and lookup table instead of complex arithmetic
+grid, cars = convert(track, cars)
+tick, first_crash, last_car_pos = part_one(grid, cars)
 
 print("\n--- Day 13 ---")
 print("part 1: answer to part one = tick {}, pos {}".format(tick, first_crash))